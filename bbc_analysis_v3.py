@@ -17,106 +17,455 @@ v3 Changes: Fixed multi_sum/exclusive_sum calculations
            Added optional co-occurrence heatmap visualization
 """
 
+import argparse
+import contextlib
+import functools
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import pandas as pd
-import matplotlib.pyplot as plt
-import textwrap
 import numpy as np
-import seaborn as sns
+
+# Optional DFA regex engines, used for the pattern scan when installed
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Optional Aho-Corasick automaton, used as a literal keyword prefilter for the re/RE2 scan
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional multi-threaded CSV reader and regex engine
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# --- COMMAND LINE ---
+# Plotting libraries are only imported when --plot is given, so headless runs skip their startup cost
+parser = argparse.ArgumentParser(description="Analyse disability coverage in BBC News headlines")
+parser.add_argument('--plot', action='store_true',
+                    help="save the coverage bar chart and co-occurrence heatmap as PNG files")
+parser.add_argument('--verify', action='store_true',
+                    help="check the optional regex engines and keyword prefilter against plain re")
+args = parser.parse_args()
 
 # --- DATA LOADING ---
+csv_path = Path('bbc-2025-07-29.csv')
+# The raw parse is cached as Parquet next to the CSV and reused until the CSV changes.
+# Missing headlines are dropped after loading, so the cache stays valid if headline_col changes.
+cache_path = csv_path.with_suffix('.parquet')
+cache_errors = (ImportError, OSError, ValueError) + ((pl.exceptions.PolarsError,) if pl is not None else ())
+
+
+def read_cache():
+    """Return the cached raw parse as a pandas DataFrame, or None if it can't be read."""
+    try:
+        if pl is not None:
+            return pd.DataFrame(pl.read_parquet(cache_path).to_dict(as_series=False))
+        return pd.read_parquet(cache_path)
+    except cache_errors:
+        # Missing Parquet engine, or a damaged cache file: parse the CSV instead
+        return None
+
+
+def write_cache(frame):
+    """Write a raw Polars or pandas parse to the cache; a failed write only loses the speed-up."""
+    # Write to a temporary file and rename it, so an interrupted run never leaves a partial cache
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        if pl is not None and isinstance(frame, pl.DataFrame):
+            frame.write_parquet(tmp_path, compression='zstd')
+        else:
+            frame.to_parquet(tmp_path, compression='zstd', index=False)
+        os.replace(tmp_path, cache_path)
+    except cache_errors + (TypeError,):
+        # Includes columns Arrow cannot encode, e.g. pandas object columns mixing ints and strings
+        with contextlib.suppress(OSError):
+            tmp_path.unlink(missing_ok=True)
+
+
+def parse_csv():
+    """Parse the CSV into a pandas DataFrame, skipping malformed rows, and cache the result."""
+    if pl is not None:
+        try:
+            # Read every column as text so values that don't fit an inferred type aren't nulled
+            pl_df = pl.read_csv(csv_path, infer_schema=False, ignore_errors=True)
+        except pl.exceptions.ComputeError:
+            # Polars rejects rows with extra fields instead of skipping them; use pandas' reader
+            pass
+        else:
+            write_cache(pl_df)
+            # Hand a plain pandas frame to the analysis
+            return pd.DataFrame(pl_df.to_dict(as_series=False))
+    
+    df = pd.read_csv(csv_path, on_bad_lines='skip')
+    write_cache(df)
+    return df
+
+
 try:
     # Load CSV, handle potential parsing errors, and define the target column
-    df = pd.read_csv('bbc-2025-07-29.csv', on_bad_lines='skip')
     headline_col = 'ssrcss-yjj6jm-LinkPostHeadline'
+    df = None
+    if cache_path.exists() and cache_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        df = read_cache()
+    loaded_from = 'Parquet cache' if df is not None else 'CSV'
+    if df is None:
+        df = parse_csv()
     
     # Clean the data by dropping rows where the headline might be missing
     df.dropna(subset=[headline_col], inplace=True)
     
-    print(f"Loaded {len(df)} articles from CSV\n")
+    print(f"Loaded {len(df)} articles from {loaded_from}\n")
     
 except FileNotFoundError:
-    print("Error: The file 'bbc-2025-07-29.csv' was not found in the current directory.")
+    print(f"Error: The file '{csv_path}' was not found in the current directory.")
     exit()
 
 
 # --- REGEX PATTERNS (REFINED WITH PLURAL HANDLING) ---
 # Using (?:...) for non-capturing groups to suppress the UserWarning and improve performance.
+# Patterns are written in lower case: headlines are lower-cased once before matching,
+# which avoids case-folding every character on every pattern.
 patterns = {
     # --- CORE DISABILITY CATEGORIES (REFINED) ---
-    "SEND/Special Schools": r"(?i)\b(?:SEND|SEN|special needs|special (?:school|education)s?|mainstream schools?|specialist primary|education plans?|teaching assistants?|pupils?|Ofsted|schools?)\b",
-    "Deaf/Hearing": r"(?i)\b(?:deaf|BSL|cochlear|hearing loss|hard of hearing|hearing dogs?|sign language|hearing-impaired|ear ?plugs?|bionic ears|lip-read|tinnitus|ringing in.+ears)\b",
-    "Blind/Vision": r"(?i)\b(?:blind(?:ness)?|Braille|visually impaired|sight(?: loss| impaired)|vision loss|partially sighted|guide dogs?|lost.+sight|losing sight|blinded)\b",
-    "Chronic Illness/Pain": r"(?i)\b(?:chronic (?:pain|illness)|fibromyalgia|ME/CFS|chronic fatigue|pain disorder|invisible illness|long covid|cancer|MS|epilepsy|seizure|stroke|dementia|colitis|cystic fibrosis|terminally ill|arthritis|cannot eat or drink|weighed|scales)\b",
-    "Physical & Mobility": r"(?i)\b(?:wheelchair|paraly[sz](?:e|i|ed|ing)|amputee|physical disabilit(?:y|ies)|spinal|limb|stomas?|one-handed|cerebral palsy|muscular dystrophy|mobility (?:aid|scooter)s?|crutch|prosthetic|quadriplegic|paraplegic|no hands|walk again|surfer)\b",
-    "Learning Disabilities": r"(?i)\b(?:learning disabilit(?:y|ies)|intellectual disabilit(?:y|ies)|Down['']s? syndrome|cognitive impairment|Makaton|non-verbal)\b",
-    "Mental Health & Neuro": r"(?i)\b(?:mental health|anxiety|depression|Tourette['']s?|bipolar|schizophrenia|psychiatric|PTSD|eating disorder|ADHD|attention deficit|toxic|overdosed|isolating)\b",
-    "Autism/Neurodiversity": r"(?i)\b(?:autis(?:m|tic)|neurodivers(?:e|ity))\b",
+    "SEND/Special Schools": r"\b(?:send|sen|special needs|special (?:school|education)s?|mainstream schools?|specialist primary|education plans?|teaching assistants?|pupils?|ofsted|schools?)\b",
+    "Deaf/Hearing": r"\b(?:deaf|bsl|cochlear|hearing loss|hard of hearing|hearing dogs?|sign language|hearing-impaired|ear ?plugs?|bionic ears|lip-read|tinnitus|ringing in.+ears)\b",
+    "Blind/Vision": r"\b(?:blind(?:ness)?|braille|visually impaired|sight(?: loss| impaired)|vision loss|partially sighted|guide dogs?|lost.+sight|losing sight|blinded)\b",
+    "Chronic Illness/Pain": r"\b(?:chronic (?:pain|illness)|fibromyalgia|me/cfs|chronic fatigue|pain disorder|invisible illness|long covid|cancer|ms|epilepsy|seizure|stroke|dementia|colitis|cystic fibrosis|terminally ill|arthritis|cannot eat or drink|weighed|scales)\b",
+    "Physical & Mobility": r"\b(?:wheelchair|paraly[sz](?:e|i|ed|ing)|amputee|physical disabilit(?:y|ies)|spinal|limb|stomas?|one-handed|cerebral palsy|muscular dystrophy|mobility (?:aid|scooter)s?|crutch|prosthetic|quadriplegic|paraplegic|no hands|walk again|surfer)\b",
+    "Learning Disabilities": r"\b(?:learning disabilit(?:y|ies)|intellectual disabilit(?:y|ies)|down['']s? syndrome|cognitive impairment|makaton|non-verbal)\b",
+    "Mental Health & Neuro": r"\b(?:mental health|anxiety|depression|tourette['']s?|bipolar|schizophrenia|psychiatric|ptsd|eating disorder|adhd|attention deficit|toxic|overdosed|isolating)\b",
+    "Autism/Neurodiversity": r"\b(?:autis(?:m|tic)|neurodivers(?:e|ity))\b",
 
     # --- THEMATIC CATEGORIES (REFINED) ---
-    "Benefits, Care & Systemic Issues": r"(?i)\b(?:PIP|DLA|DSA|benefits?|welfare|blue badges?|social care|carers?|council|funding|NHS|Universal Credit|assessment|respite|inquest|ombudsman|care (?:package|home|plan|subsidy|loophole|agency|needs)|day centres?|supported living|telecare|hydrotherapy|Oliver McGowan|foster homes?|hospitals?|policy|government|failures)\b",
-    "Accessibility & Inclusion": r"(?i)\b(?:accessib(?:le|ility)|inclusive|inclusion|adapt(?:ed|ive)|passport|ramps?|step-free|accessible toilets?|parking (?:bay|permit)s?|boardwalks?|communication boards?|inaccessible|barriers|priority seats?|quiet spaces?|adapt clothes)\b",
-    "Family & Carer Perspective": r"(?i)\b(?:parent|mum|mom|dad|mother|father|family|son|daughter|children|child|husband|wife)\b",
-    "Sports, Arts & Culture": r"(?i)\b(?:paralympi(?:an|c|cs)|Special Olympics|Olympic|sports?|football(?:ers)?|rugby|swim|cycl(?:ing)?|ski|race|artist|music|choir|theatre|pianist|actor|model|vogue|Proms|Glastonbury|cheerleading|snooker|goalball|triathlon|cricket|powerchair footballers?|wing walk|culture|gig|circus|Marathon|panto|tennis|para-driver|climbing wall|rower)\b",
-    "Charity, People & Community": r"(?i)\b(?:charity|fundrais|donation|volunteer|community|campaigner|trust|foundation|MBE|OBE|BEM|honour(?:ed)?|honorary degrees?|Rose Ayling-Ellis|Grey-Thompson|Billy Monger|Sammi Kinghorn|Rosie Jones|Christine McGuiness|Sally Phillips|Adrian Scarborough|pioneers?|tributes?|awards?|Dragons' Den|blue plaques?)\b",
-    "Animals & Well-being": r"(?i)\b(?:(?:guide|hearing|assistance|service|support|therapy) (?:dogs?|puppy|puppies|animals?|cats?|horses?|cockapoo|donkeys?)|Crufts|miniature horses?|emotional support|guinea pigs?|skunks?|canine|trainee guide dogs?|toy squirrel.*guide dogs?)\b",
-    "Infrastructure & Transport": r"(?i)\b(?:lifts?|minibus(?:es)?|bus cuts?|footbridges?|pavements?|stations?|TfL|transport|trikes?|housing|home adaptations?)\b",
-    "Work, Employment & Enterprise": r"(?i)\b(?:cafe|brewery|garden centres?|farms?|work coach(?:es)?|jobs?|workplace|employees?|working|unemployed|employment)\b",
+    "Benefits, Care & Systemic Issues": r"\b(?:pip|dla|dsa|benefits?|welfare|blue badges?|social care|carers?|council|funding|nhs|universal credit|assessment|respite|inquest|ombudsman|care (?:package|home|plan|subsidy|loophole|agency|needs)|day centres?|supported living|telecare|hydrotherapy|oliver mcgowan|foster homes?|hospitals?|policy|government|failures)\b",
+    "Accessibility & Inclusion": r"\b(?:accessib(?:le|ility)|inclusive|inclusion|adapt(?:ed|ive)|passport|ramps?|step-free|accessible toilets?|parking (?:bay|permit)s?|boardwalks?|communication boards?|inaccessible|barriers|priority seats?|quiet spaces?|adapt clothes)\b",
+    "Family & Carer Perspective": r"\b(?:parent|mum|mom|dad|mother|father|family|son|daughter|children|child|husband|wife)\b",
+    "Sports, Arts & Culture": r"\b(?:paralympi(?:an|c|cs)|special olympics|olympic|sports?|football(?:ers)?|rugby|swim|cycl(?:ing)?|ski|race|artist|music|choir|theatre|pianist|actor|model|vogue|proms|glastonbury|cheerleading|snooker|goalball|triathlon|cricket|powerchair footballers?|wing walk|culture|gig|circus|marathon|panto|tennis|para-driver|climbing wall|rower)\b",
+    "Charity, People & Community": r"\b(?:charity|fundrais|donation|volunteer|community|campaigner|trust|foundation|mbe|obe|bem|honour(?:ed)?|honorary degrees?|rose ayling-ellis|grey-thompson|billy monger|sammi kinghorn|rosie jones|christine mcguiness|sally phillips|adrian scarborough|pioneers?|tributes?|awards?|dragons' den|blue plaques?)\b",
+    "Animals & Well-being": r"\b(?:(?:guide|hearing|assistance|service|support|therapy) (?:dogs?|puppy|puppies|animals?|cats?|horses?|cockapoo|donkeys?)|crufts|miniature horses?|emotional support|guinea pigs?|skunks?|canine|trainee guide dogs?|toy squirrel.*guide dogs?)\b",
+    "Infrastructure & Transport": r"\b(?:lifts?|minibus(?:es)?|bus cuts?|footbridges?|pavements?|stations?|tfl|transport|trikes?|housing|home adaptations?)\b",
+    "Work, Employment & Enterprise": r"\b(?:cafe|brewery|garden centres?|farms?|work coach(?:es)?|jobs?|workplace|employees?|working|unemployed|employment)\b",
     
     # --- HUMAN INTEREST STORIES ---
-    "Personal Stories & Empowerment": r"(?i)\b(?:inspire|inspirational|dream|journey|thriving|empowered|experience|overcame|making most of life|'s story|life-changing|my life|my face|my GP told me|defies|hopeful|mission|letter of thanks)\b",
+    "Personal Stories & Empowerment": r"\b(?:inspire|inspirational|dream|journey|thriving|empowered|experience|overcame|making most of life|'s story|life-changing|my life|my face|my gp told me|defies|hopeful|mission|letter of thanks)\b",
 
     # --- GENERAL CATCH-ALL ---
-    "General 'Disability' Keyword": r"(?i)\b(?:disabilit(?:y|ies)|disabled|handicap|impairment|vulnerable|additional needs|enable new experiences)\b"
+    "General 'Disability' Keyword": r"\b(?:disabilit(?:y|ies)|disabled|handicap|impairment|vulnerable|additional needs|enable new experiences)\b"
 }
 
+# Compile every pattern once up front so the per-row loops below don't re-parse them
+compiled_patterns = {label: re.compile(pattern) for label, pattern in patterns.items()}
+
+
+def literal_prefixes(pattern):
+    """Return the literal text every match of a top-level alternative must start with.
+
+    Works on patterns of the form \\b(?:alt1|alt2|...)\\b and returns None when any
+    alternative has no literal prefix, since such a pattern cannot be prefiltered.
+    """
+    if not (pattern.startswith(r"\b(?:") and pattern.endswith(r")\b")):
+        return None
+
+    # Split the body on '|' at the top nesting level only, skipping escaped
+    # characters and character classes, whose '|' and parentheses are literal
+    body = pattern[5:-3]
+    alternatives, depth, current, in_class, i = [], 0, "", False, 0
+    while i < len(body):
+        char = body[i]
+        if char == "\\":
+            current += body[i:i + 2]
+            i += 2
+            continue
+        if in_class:
+            # A ']' straight after '[' or '[^' is a literal member of the class
+            if char == "]" and not current.endswith(("[", "[^")):
+                in_class = False
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                # The opening group closes before the end, e.g. \b(?:a)\b|\b(?:b)\b
+                return None
+        elif char == "|" and depth == 0:
+            alternatives.append(current)
+            current = ""
+            i += 1
+            continue
+        current += char
+        i += 1
+    if depth != 0 or in_class:
+        return None
+    alternatives.append(current)
+
+    prefixes = []
+    for alternative in alternatives:
+        prefix = ""
+        for char in alternative:
+            if char in "?*{":
+                # The preceding character is optional, so it can't be required
+                prefix = prefix[:-1]
+                break
+            if char in "\\.[](){}|^$+":
+                break
+            prefix += char
+        if not prefix:
+            return None
+        prefixes.append(prefix)
+    return prefixes
+
+
+def literal_candidates(headlines):
+    """Return a bool (headlines x patterns) matrix of the rows worth checking with each regex.
+
+    A single Aho-Corasick pass finds every literal keyword in each headline; patterns
+    without usable literal prefixes (or all patterns, without pyahocorasick) keep every row.
+    """
+    candidates = np.ones((len(headlines), len(patterns)), dtype=bool)
+    if ahocorasick is None:
+        return candidates
+
+    keyword_cols = {}
+    for col, pattern in enumerate(patterns.values()):
+        prefixes = literal_prefixes(pattern)
+        if prefixes is None:
+            continue
+        candidates[:, col] = False
+        for prefix in prefixes:
+            keyword_cols.setdefault(prefix, set()).add(col)
+    if not keyword_cols:
+        return candidates
+
+    automaton = ahocorasick.Automaton()
+    for keyword, cols in keyword_cols.items():
+        automaton.add_word(keyword, list(cols))
+    automaton.make_automaton()
+
+    for row, headline in enumerate(headlines):
+        for _, cols in automaton.iter(headline):
+            candidates[row, cols] = True
+    return candidates
+
+
+def build_mask_matrix(headlines, ascii_engines=True):
+    """Return a uint8 (headlines x patterns) matrix with 1 wherever a headline matches a pattern.
+
+    Headlines are expected to be lower-cased already, so all engines match case-sensitively.
+
+    Hyperscan matches every pattern in a single pass over each headline; otherwise Polars
+    evaluates the patterns across threads, then RE2, and Python's re is used
+    when none of these engines are installed. The RE2 and re scans only verify the rows
+    that pass the literal keyword prefilter, one thread per pattern.
+
+    Hyperscan and RE2 only have ASCII word boundaries, so they are given the ASCII
+    headlines and the rest go to the Unicode-aware Polars / re scan (ascii_engines=False).
+    """
+    mask = np.zeros((len(headlines), len(patterns)), dtype=np.uint8)
+
+    if ascii_engines and (hyperscan is not None or re2 is not None):
+        is_ascii = headlines.str.isascii().to_numpy(dtype=bool)
+        if not is_ascii.all():
+            # e.g. \bski\b must not match "skiën", as it doesn't with Python's re
+            mask[is_ascii] = build_mask_matrix(headlines[is_ascii].reset_index(drop=True))
+            mask[~is_ascii] = build_mask_matrix(headlines[~is_ascii].reset_index(drop=True),
+                                                ascii_engines=False)
+            return mask
+
+    if ascii_engines and hyperscan is not None:
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=[pattern.encode() for pattern in patterns.values()],
+                ids=list(range(len(patterns))),
+                flags=[hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8] * len(patterns),
+            )
+        except hyperscan.error as e:
+            print(f"Hyperscan could not compile the patterns ({e}), falling back")
+        else:
+            def on_match(pattern_id, start, end, flags, row):
+                mask[row, pattern_id] = 1
+
+            for row, headline in enumerate(headlines):
+                db.scan(headline.encode(), match_event_handler=on_match, context=row)
+            return mask
+
+    if pl is not None:
+        frame = pl.DataFrame({"headline": headlines.tolist()})
+        try:
+            matches = frame.select([
+                pl.col("headline").str.contains(pattern).alias(label)
+                for label, pattern in patterns.items()
+            ])
+        except pl.exceptions.ComputeError:
+            # The Rust regex crate has no lookarounds or backreferences
+            print("Polars could not compile the patterns (lookarounds and backreferences "
+                  "are unsupported), falling back")
+        else:
+            return matches.to_numpy().astype(np.uint8)
+
+    candidates = literal_candidates(headlines)
+
+    def scan_column(col, label):
+        # Each task fills its own column of the mask, so the threads never share output
+        rows = candidates[:, col]
+        regex = None
+        if ascii_engines and re2 is not None:
+            try:
+                regex = re2.compile(patterns[label])
+            except re2.error:
+                # RE2 has no lookarounds or backreferences; use Python's re for this pattern
+                pass
+        if regex is None:
+            # Not pandas str.contains: on Arrow-backed strings it runs the pattern through RE2
+            regex = compiled_patterns[label]
+        mask[rows, col] = [regex.search(headline) is not None for headline in headlines[rows]]
+
+    # The patterns are independent, so scan them concurrently
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        list(pool.map(scan_column, range(len(patterns)), patterns))
+    return mask
+
+
+def headlines_for(results, label):
+    """Return the headlines selected by a category's row mask in a results dict."""
+    return df.loc[results[label]["mask"], headline_col].tolist()
+
+
+# Below this many headlines the packed-bit count beats Numba once numba's import and
+# cached-kernel load (~0.3 s per run, ~1.8 s on the first compile) are included
+NUMBA_MIN_ROWS = 3_000_000
+
+
+@functools.lru_cache(maxsize=None)
+def numba_upper_cooccurrence():
+    """Return a Numba kernel counting upper-triangle co-occurrences, or None without numba."""
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+
+    @njit(parallel=True, cache=True)
+    def upper_cooccurrence(mask):
+        # Each thread owns one output row, so the accumulation is race-free
+        n, k = mask.shape
+        out = np.zeros((k, k), np.int64)
+        for i in prange(k):
+            for r in range(n):
+                if mask[r, i]:
+                    for j in range(i, k):
+                        if mask[r, j]:
+                            out[i, j] += 1
+        return out
+
+    return upper_cooccurrence
+
+
+def cooccurrence_counts(mask):
+    """Return the symmetric (categories x categories) co-occurrence counts for a mask matrix."""
+    kernel = numba_upper_cooccurrence() if len(mask) >= NUMBA_MIN_ROWS else None
+    if kernel is not None:
+        out = kernel(np.ascontiguousarray(mask))
+        return out + out.T - np.diag(np.diag(out))
+
+    # Pack eight headlines per byte and popcount the AND of each pair of category bitsets
+    packed = np.packbits(mask.astype(bool), axis=0)
+    k = packed.shape[1]
+    out = np.empty((k, k), np.int64)
+    for i in range(k):
+        shared = packed[:, [i]] & packed
+        if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+            out[i] = np.bitwise_count(shared).sum(axis=0)
+        else:
+            out[i] = np.unpackbits(shared, axis=0).sum(axis=0)
+    return out
+
 
 # --- MULTI-CATEGORY ANALYSIS (ORIGINAL APPROACH) ---
 print("=" * 60)
 print("MULTI-CATEGORY ANALYSIS (Headlines can match multiple categories)")
 print("=" * 60)
 
+# Scan the headlines once per pattern and keep the results as a (headlines x categories) matrix.
+# The multi-category counts, exclusive assignment and co-occurrence heatmap are all derived from it.
+# Duplicate headlines (republished stories) are only matched once: scan the unique values
+# of a categorical column and expand back to one row per article through its codes.
+labels = list(patterns)
+headline_cats = df[headline_col].astype('category')
+unique_headlines = pd.Series(headline_cats.cat.categories).str.lower()
+headline_codes = headline_cats.cat.codes.to_numpy()
+# A -1 code (missing headline) would silently pick up the last unique headline's matches
+assert (headline_codes >= 0).all(), "missing headlines must be dropped before matching"
+unique_mask = build_mask_matrix(unique_headlines)
+
+if args.verify:
+    # Re-run every pattern with plain re on every headline and compare
+    reference = np.array([
+        [regex.search(headline) is not None for regex in compiled_patterns.values()]
+        for headline in unique_headlines
+    ], dtype=bool).reshape(len(unique_headlines), len(patterns))
+    dropped = reference & ~literal_candidates(unique_headlines)
+    mismatched = reference != unique_mask.astype(bool)
+    problems = False
+    for col, label in enumerate(patterns):
+        if dropped[:, col].any():
+            print(f"Verify: keyword prefilter drops {dropped[:, col].sum()} real matches for '{label}'")
+            problems = True
+        if mismatched[:, col].any():
+            print(f"Verify: mask differs from plain re on {mismatched[:, col].sum()} headlines for '{label}'")
+            problems = True
+    if problems:
+        exit(1)
+    print("Verify: all engines and the keyword prefilter agree with plain re\n")
+
+mask_matrix = unique_mask[headline_codes]
+multi_counts = mask_matrix.sum(axis=0)
+
 multi_category_results = {}
-all_matched_indices = set()
+all_matched_mask = np.zeros(len(df), dtype=bool)
 
-# Loop through each pattern to categorize headlines
-for label, pattern in patterns.items():
-    # Find all rows where the headline matches the current pattern
-    matches = df[headline_col].str.contains(pattern, regex=True, na=False)
-    
-    # Get the indices of the matched headlines
-    matched_indices = df[matches].index
+for i, label in enumerate(labels):
+    matches = mask_matrix[:, i].astype(bool)
     
-    # Add these indices to our master set of all matched headlines
-    all_matched_indices.update(matched_indices)
+    # Mark these headlines as matched by at least one category
+    all_matched_mask |= matches
     
-    # Store the count and the list of headlines for this category
-    matched_headlines = df.loc[matched_indices, headline_col].tolist()
+    # Store the count and the row mask for this category (see headlines_for)
     multi_category_results[label] = {
-        "count": len(matched_headlines),
-        "headlines": matched_headlines
+        "count": int(multi_counts[i]),
+        "mask": matches
     }
 
 # Find uncategorized headlines for multi-category approach
-unmatched_indices = set(df.index) - all_matched_indices
-unmatched_headlines = df.loc[list(unmatched_indices), headline_col].tolist()
-
 multi_category_results["Uncategorized"] = {
-    "count": len(unmatched_headlines),
-    "headlines": unmatched_headlines
+    "count": int((~all_matched_mask).sum()),
+    "mask": ~all_matched_mask
 }
 
 # Calculate multi_sum properly (excluding Uncategorized)
 multi_sum = sum(res['count'] for label, res in multi_category_results.items() if label != "Uncategorized")
 
 # Print multi-category counts
-multi_counts_sorted = dict(sorted(
-    {label: res['count'] for label, res in multi_category_results.items() if res['count'] > 0}.items(),
+multi_counts_sorted = sorted(
+    ((label, res['count']) for label, res in multi_category_results.items() if res['count'] > 0),
     key=lambda item: item[1], reverse=True
-))
+)
 
 print("\nMulti-category counts:")
-for label, count in multi_counts_sorted.items():
+for label, count in multi_counts_sorted:
     percentage = (count / len(df)) * 100 if label != "Uncategorized" else (count / len(df)) * 100
     print(f"  {label}: {count} articles ({percentage:.1f}%)")
 print(f"\nTotal multi-category counts (excluding Uncategorized): {multi_sum}")
@@ -128,38 +477,36 @@ print("\n" + "=" * 60)
 print("EXCLUSIVE CATEGORY ANALYSIS (First match wins)")
 print("=" * 60)
 
-exclusive_category_results = {label: {"count": 0, "headlines": []} for label in patterns.keys()}
-exclusive_category_results["Uncategorized"] = {"count": 0, "headlines": []}
+# The first matching column in each row of the mask matrix is the winning category.
+# The multi-category counts and heatmap need every mask anyway, so this runs no extra
+# regex work; re-scanning a shrinking set of unassigned rows would only add passes.
+first_idx = mask_matrix.argmax(axis=1)
+has_any = mask_matrix.any(axis=1)
+exclusive_codes = np.where(has_any, first_idx, -1)  # -1 = Uncategorized
 
-# Process each headline once, assigning to first matching category
-for idx, row in df.iterrows():
-    headline = str(row[headline_col])
-    matched = False
-    
-    # Check patterns in order - first match wins
-    for label, pattern in patterns.items():
-        if re.search(pattern, headline):
-            exclusive_category_results[label]["count"] += 1
-            exclusive_category_results[label]["headlines"].append(headline)
-            matched = True
-            break
-    
-    # If no pattern matched, it's uncategorized
-    if not matched:
-        exclusive_category_results["Uncategorized"]["count"] += 1
-        exclusive_category_results["Uncategorized"]["headlines"].append(headline)
+# Count every assigned code in one pass; slot 0 holds the Uncategorized (-1) rows
+exclusive_counts = np.bincount(exclusive_codes + 1, minlength=len(labels) + 1)
+
+exclusive_category_results = {
+    label: {"count": int(exclusive_counts[i + 1]), "mask": exclusive_codes == i}
+    for i, label in enumerate(labels)
+}
+exclusive_category_results["Uncategorized"] = {
+    "count": int(exclusive_counts[0]),
+    "mask": exclusive_codes == -1
+}
 
 # Calculate exclusive_sum properly
 exclusive_sum = sum(res['count'] for res in exclusive_category_results.values())
 
 # Print exclusive category counts
-exclusive_counts_sorted = dict(sorted(
-    {label: res['count'] for label, res in exclusive_category_results.items() if res['count'] > 0}.items(),
+exclusive_counts_sorted = sorted(
+    ((label, res['count']) for label, res in exclusive_category_results.items() if res['count'] > 0),
     key=lambda item: item[1], reverse=True
-))
+)
 
 print("\nExclusive category counts:")
-for label, count in exclusive_counts_sorted.items():
+for label, count in exclusive_counts_sorted:
     percentage = (count / len(df)) * 100
     print(f"  {label}: {count} articles ({percentage:.1f}%)")
 print(f"\nTotal exclusive counts: {exclusive_sum}")
@@ -171,112 +518,124 @@ print("\n" + "=" * 60)
 print("SAMPLE UNCATEGORIZED HEADLINES (for regex refinement)")
 print("=" * 60)
 
-if exclusive_category_results["Uncategorized"]["headlines"]:
-    print(f"\nShowing first 20 of {len(exclusive_category_results['Uncategorized']['headlines'])} uncategorized headlines:")
-    for i, headline in enumerate(exclusive_category_results["Uncategorized"]["headlines"][:20], 1):
+uncategorized_headlines = headlines_for(exclusive_category_results, "Uncategorized")
+
+if uncategorized_headlines:
+    print(f"\nShowing first 20 of {len(uncategorized_headlines)} uncategorized headlines:")
+    for i, headline in enumerate(uncategorized_headlines[:20], 1):
         print(f"{i:2}. {headline}")
 else:
     print("All headlines were successfully categorized!")
 
 
 # --- VISUALIZATION: SIDE-BY-SIDE COMPARISON ---
-print("\n" + "=" * 60)
-print("GENERATING VISUALIZATION...")
-print("=" * 60)
-
-# Prepare data for plotting - use all categories for consistent comparison
-all_categories = list(patterns.keys()) + ["Uncategorized"]
-multi_values = [multi_category_results.get(cat, {"count": 0})["count"] for cat in all_categories]
-exclusive_values = [exclusive_category_results.get(cat, {"count": 0})["count"] for cat in all_categories]
-
-# Sort by exclusive counts for better readability
-sorted_indices = np.argsort(exclusive_values)
-all_categories = [all_categories[i] for i in sorted_indices]
-multi_values = [multi_values[i] for i in sorted_indices]
-exclusive_values = [exclusive_values[i] for i in sorted_indices]
-
-# Create figure with side-by-side bars
-fig, ax = plt.subplots(figsize=(16, 12))
-
-# Calculate bar positions
-y_pos = np.arange(len(all_categories))
-bar_height = 0.35
-
-# Create bars
-bars1 = ax.barh(y_pos - bar_height/2, multi_values, bar_height, 
-                label='Multi-category', color='#2E86AB', alpha=0.8, edgecolor='black', linewidth=0.5)
-bars2 = ax.barh(y_pos + bar_height/2, exclusive_values, bar_height,
-                label='Exclusive', color='#A23B72', alpha=0.8, edgecolor='black', linewidth=0.5)
-
-# Customize the plot
-ax.set_xlabel('Number of Articles', fontsize=12)
-ax.set_title('BBC Disability News Coverage: Multi-category vs Exclusive Counts\n(707 total articles)', 
-             fontsize=16, pad=20)
-ax.set_yticks(y_pos)
-ax.set_yticklabels([textwrap.fill(label, 25) for label in all_categories], fontsize=10)
-ax.legend(loc='lower right', fontsize=11)
-ax.grid(axis='x', alpha=0.3)
-
-# Add value labels on bars
-for bars in [bars1, bars2]:
-    for bar in bars:
-        width = bar.get_width()
-        if width > 0:  # Only show label if count > 0
-            ax.text(width + 1, bar.get_y() + bar.get_height()/2, f'{int(width)}',
-                   ha='left', va='center', fontsize=9)
-
-# Add totals in the title area
-ax.text(0.02, 0.98, f'Multi-category total: {multi_sum} (with overlaps)\nExclusive total: {exclusive_sum} (unique articles)', 
-        transform=ax.transAxes, fontsize=10, verticalalignment='top',
-        bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
-
-plt.tight_layout()
-plt.savefig('bbc_disability_coverage_v3.png', dpi=300, bbox_inches='tight')
-plt.show()
+if args.plot:
+    import matplotlib.pyplot as plt
+    import textwrap
+
+    print("\n" + "=" * 60)
+    print("GENERATING VISUALIZATION...")
+    print("=" * 60)
+
+    # Prepare data for plotting - use all categories for consistent comparison
+    all_categories = list(patterns.keys()) + ["Uncategorized"]
+    multi_values = [multi_category_results.get(cat, {"count": 0})["count"] for cat in all_categories]
+    exclusive_values = [exclusive_category_results.get(cat, {"count": 0})["count"] for cat in all_categories]
+
+    # Sort by exclusive counts for better readability
+    sorted_indices = np.argsort(exclusive_values)
+    all_categories = [all_categories[i] for i in sorted_indices]
+    multi_values = [multi_values[i] for i in sorted_indices]
+    exclusive_values = [exclusive_values[i] for i in sorted_indices]
+
+    # Create figure with side-by-side bars
+    fig, ax = plt.subplots(figsize=(16, 12))
+
+    # Calculate bar positions
+    y_pos = np.arange(len(all_categories))
+    bar_height = 0.35
+
+    # Create bars
+    bars1 = ax.barh(y_pos - bar_height/2, multi_values, bar_height, 
+                    label='Multi-category', color='#2E86AB', alpha=0.8, edgecolor='black', linewidth=0.5)
+    bars2 = ax.barh(y_pos + bar_height/2, exclusive_values, bar_height,
+                    label='Exclusive', color='#A23B72', alpha=0.8, edgecolor='black', linewidth=0.5)
+
+    # Customize the plot
+    ax.set_xlabel('Number of Articles', fontsize=12)
+    ax.set_title('BBC Disability News Coverage: Multi-category vs Exclusive Counts\n(707 total articles)', 
+                 fontsize=16, pad=20)
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels([textwrap.fill(label, 25) for label in all_categories], fontsize=10)
+    ax.legend(loc='lower right', fontsize=11)
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels on bars
+    for bars in [bars1, bars2]:
+        for bar in bars:
+            width = bar.get_width()
+            if width > 0:  # Only show label if count > 0
+                ax.text(width + 1, bar.get_y() + bar.get_height()/2, f'{int(width)}',
+                       ha='left', va='center', fontsize=9)
+
+    # Add totals in the title area
+    ax.text(0.02, 0.98, f'Multi-category total: {multi_sum} (with overlaps)\nExclusive total: {exclusive_sum} (unique articles)', 
+            transform=ax.transAxes, fontsize=10, verticalalignment='top',
+            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
+
+    plt.tight_layout()
+    plt.savefig('bbc_disability_coverage_v3.png', dpi=300, bbox_inches='tight')
+    plt.show()
 
 
 # --- CO-OCCURRENCE HEATMAP (NEW IN V3) ---
-print("\n" + "=" * 60)
-print("GENERATING CO-OCCURRENCE HEATMAP...")
-print("=" * 60)
-
 # Create co-occurrence matrix (excluding Uncategorized and General Disability Keyword for clarity)
 categories_for_heatmap = [cat for cat in patterns.keys() 
                           if cat not in ["Uncategorized", "General 'Disability' Keyword"]]
 
-co_occurrence_matrix = pd.DataFrame(0, index=categories_for_heatmap, columns=categories_for_heatmap)
-
-# Count co-occurrences
-for idx, row in df.iterrows():
-    headline = str(row[headline_col])
-    matched_cats = []
-    
-    for label in categories_for_heatmap:
-        pattern = patterns[label]
-        if re.search(pattern, headline):
-            matched_cats.append(label)
-    
-    # Update co-occurrence matrix
-    for i, cat1 in enumerate(matched_cats):
-        for cat2 in matched_cats[i:]:
-            co_occurrence_matrix.at[cat1, cat2] += 1
-            if cat1 != cat2:
-                co_occurrence_matrix.at[cat2, cat1] += 1
-
-# Create heatmap
-plt.figure(figsize=(14, 12))
-sns.heatmap(co_occurrence_matrix, annot=True, fmt='d', cmap='YlOrRd', 
-            cbar_kws={'label': 'Number of Co-occurrences'},
-            linewidths=0.5, linecolor='gray')
-plt.title('Co-occurrence Matrix of Disability Categories in BBC Coverage\n(How often categories appear together)', 
-          fontsize=14, pad=20)
-plt.xlabel('Category', fontsize=12)
-plt.ylabel('Category', fontsize=12)
-plt.xticks(rotation=45, ha='right')
-plt.yticks(rotation=0)
-plt.tight_layout()
-plt.savefig('bbc_cooccurrence_heatmap_v3.png', dpi=300, bbox_inches='tight')
-plt.show()
+# Diagonal = articles in a category, off-diagonal = articles shared by two categories
+heatmap_idx = [labels.index(cat) for cat in categories_for_heatmap]
+co_occurrence_matrix = pd.DataFrame(cooccurrence_counts(mask_matrix[:, heatmap_idx]),
+                                    index=categories_for_heatmap, columns=categories_for_heatmap)
+
+if args.plot:
+    import matplotlib.pyplot as plt
+
+    print("\n" + "=" * 60)
+    print("GENERATING CO-OCCURRENCE HEATMAP...")
+    print("=" * 60)
+
+    # Create heatmap directly from the NumPy counts
+    matrix = co_occurrence_matrix.to_numpy()
+    n_heatmap = len(categories_for_heatmap)
+
+    fig, ax = plt.subplots(figsize=(14, 12))
+    im = ax.imshow(matrix, cmap='YlOrRd', aspect='auto')
+    fig.colorbar(im, ax=ax, label='Number of Co-occurrences')
+
+    # Thin grey borders between cells
+    ax.set_xticks(np.arange(n_heatmap + 1) - 0.5, minor=True)
+    ax.set_yticks(np.arange(n_heatmap + 1) - 0.5, minor=True)
+    ax.grid(which='minor', color='gray', linewidth=0.5)
+    ax.tick_params(which='minor', length=0)
+
+    # Annotate every cell, switching to white text on the darker cells
+    for i in range(n_heatmap):
+        for j in range(n_heatmap):
+            ax.text(j, i, matrix[i, j], ha='center', va='center',
+                    color='white' if matrix[i, j] > matrix.max() / 2 else 'black')
+
+    ax.set_title('Co-occurrence Matrix of Disability Categories in BBC Coverage\n(How often categories appear together)', 
+                 fontsize=14, pad=20)
+    ax.set_xlabel('Category', fontsize=12)
+    ax.set_ylabel('Category', fontsize=12)
+    ax.set_xticks(np.arange(n_heatmap))
+    ax.set_xticklabels(categories_for_heatmap, rotation=45, ha='right')
+    ax.set_yticks(np.arange(n_heatmap))
+    ax.set_yticklabels(categories_for_heatmap, rotation=0)
+    plt.tight_layout()
+    plt.savefig('bbc_cooccurrence_heatmap_v3.png', dpi=300, bbox_inches='tight')
+    plt.show()
 
 
 # --- VISIBILITY ANALYSIS ---
@@ -288,13 +647,16 @@ print("=" * 60)
 visible_categories = ["Deaf/Hearing", "Blind/Vision", "Physical & Mobility", "Learning Disabilities"]
 invisible_categories = ["Chronic Illness/Pain", "Mental Health & Neuro", "Autism/Neurodiversity"]
 
+visible_idx = [labels.index(cat) for cat in visible_categories]
+invisible_idx = [labels.index(cat) for cat in invisible_categories]
+
 # Calculate visibility ratios for exclusive categories
-visible_exclusive = sum(exclusive_category_results[cat]["count"] for cat in visible_categories)
-invisible_exclusive = sum(exclusive_category_results[cat]["count"] for cat in invisible_categories)
+visible_exclusive = int(np.isin(exclusive_codes, visible_idx).sum())
+invisible_exclusive = int(np.isin(exclusive_codes, invisible_idx).sum())
 
 # Calculate visibility ratios for multi-category
-visible_multi = sum(multi_category_results[cat]["count"] for cat in visible_categories)
-invisible_multi = sum(multi_category_results[cat]["count"] for cat in invisible_categories)
+visible_multi = int(mask_matrix[:, visible_idx].sum())
+invisible_multi = int(mask_matrix[:, invisible_idx].sum())
 
 print(f"\nExclusive Category Analysis:")
 print(f"  Visible disabilities: {visible_exclusive} articles ({(visible_exclusive/len(df)*100):.1f}%)")
@@ -312,6 +674,9 @@ print("Analysis complete!")
 print(f"Multi-category approach found {multi_sum} category matches across {len(df)} articles")
 print(f"Exclusive approach assigned {exclusive_sum} articles uniquely")
 print(f"Average categories per article: {multi_sum/len(df):.2f}")
-print("\nVisualizations saved as:")
-print("  - bbc_disability_coverage_v3.png")
-print("  - bbc_cooccurrence_heatmap_v3.png")
\ No newline at end of file
+if args.plot:
+    print("\nVisualizations saved as:")
+    print("  - bbc_disability_coverage_v3.png")
+    print("  - bbc_cooccurrence_heatmap_v3.png")
+else:
+    print("\nRun with --plot to generate the bar chart and co-occurrence heatmap")
\ No newline at end of file